@@ -1,23 +1,59 @@
+import fitz
 from PyPDF2 import PdfReader
 import os
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
-def extract_text_pypdf2(pdf_path):
+def iter_pages_pymupdf(doc):
+    try:
+        for page in doc:
+            yield page.get_text("text")
+    finally:
+        doc.close()
+
+def iter_pages_pypdf2(pdf_path):
     reader = PdfReader(pdf_path)
-    full_text = ""
     for page in reader.pages:
-        full_text += page.extract_text() + "\n" # Add newline for page separation
-    return full_text
+        yield page.extract_text() or ""
+
+def stream_text(pdf_path):
+    # PyMuPDF is much faster; PyPDF2 is only kept for PDFs fitz cannot open
+    try:
+        pages = iter_pages_pymupdf(fitz.open(pdf_path))
+    except RuntimeError:
+        pages = iter_pages_pypdf2(pdf_path)
+    for i, page_text in enumerate(pages):
+        if i:
+            yield "\n" # Add newline for page separation
+        yield page_text
+
+output_dir = Path("extracted_txt")
+
+def process_one(pdf_file):
+    doc_name = Path(pdf_file).stem
+    out_path = output_dir.joinpath(doc_name + ".txt")
+    has_text = False
+
+    # Write page by page so the whole document is never held in memory
+    with out_path.open("w", encoding="utf-8") as f:
+        for text in stream_text(pdf_file):
+            if not has_text and text.strip():
+                has_text = True
+            f.write(text)
+
+    # Scanned PDFs have no text layer; flag them for OCR instead of keeping an empty file
+    if not has_text:
+        out_path.unlink()
+    return doc_name, not has_text
 
 # Example usage:
 
-policy_docs = 'PolicyDocs'
-for doc in os.listdir(policy_docs):
-    if doc.endswith(".pdf"):
-        pdf_file = os.path.join(policy_docs, doc)
-        doc_name = pdf_file.split("/")[-1].replace(".pdf", "")
-        extracted_content = extract_text_pypdf2(pdf_file)
-        print("Processed", doc_name)
-
-    # To save to a text file:
-    with open(f"{doc_name}.txt", "w", encoding="utf-8") as f:
-        f.write(extracted_content)  
\ No newline at end of file
+if __name__ == "__main__":
+    policy_docs = 'PolicyDocs'
+    pdf_files = [os.path.join(policy_docs, d) for d in os.listdir(policy_docs) if d.endswith(".pdf")]
+    output_dir.mkdir(exist_ok=True)
+
+    # Each PDF is independent, so extract them in parallel across cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for doc_name, needs_ocr in executor.map(process_one, pdf_files):
+            print("Needs OCR" if needs_ocr else "Processed", doc_name)
@@ -1,101 +1,214 @@
 import re
-import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import os
+import mmap
+import json
+import hashlib
+import functools
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    # Optional (pip install google-re2): re2 matches in linear time, so pathological PDF
+    # lines cannot trigger backtracking, at the cost of slower matching on normal input
+    import re2
+except ImportError:
+    re2 = None
+
+
+def _compile(pattern, flags=0):
+    # Only the whole-text scans go through re2; its per-call overhead makes it slower
+    # than re for the short per-line patterns, which are compiled with re directly.
+    # TOC text is matched with ASCII classes: re2's \d, \s and \b are ASCII-only,
+    # and re.ASCII keeps the fallback consistent with it while being cheaper to match
+    if re2 is not None:
+        try:
+            inline = ''.join(c for f, c in ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm')) if flags & f)
+            return re2.compile((f'(?{inline})' if inline else '') + pattern)
+        except re2.error:
+            pass
+    return re.compile(pattern, flags | re.ASCII)
+
+
+# Unicode horizontal spaces that ASCII \s does not match
+UNICODE_SPACE_CHARS = '\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u202f\u205f\u3000'
+UNICODE_SPACES = str.maketrans(dict.fromkeys(UNICODE_SPACE_CHARS, ' '))
+# The header is searched before the TOC window is normalized, so it accepts both kinds of space
+HEADER_WS = '[\\s' + UNICODE_SPACE_CHARS + ']'
+
+TOC_HEADER_RE = _compile(
+    r'(^|\n)' + HEADER_WS + r'*(TABLE' + HEADER_WS + r'+OF' + HEADER_WS + r'*CONTENTS|TABLEOFCONTENTS|Contents|TABLE OFCONTENTS|TABLE OF CONTENTS)' + HEADER_WS + r'*(\n|$)',
+    re.IGNORECASE,
+)
+TOC_HEADER_LINE_RE = re.compile(r'^(TABLE\s+OF\s*CONTENTS|TABLEOFCONTENTS|Contents|TABLE OFCONTENTS|TABLE OF CONTENTS)$', re.IGNORECASE | re.ASCII)
+BODY_START_RE = re.compile(r'\n\n[A-Z][a-z].{20,}', re.ASCII)
+DOTS_PAGE_RE = re.compile(r'\.{2,}\s*\d+\s*$', re.ASCII)
+DOTS_RE = re.compile(r'\.{2,}', re.ASCII)
+# One TOC entry per line, tried in order: "title ... page", "title -page", "title page"
+ENTRY_RE = _compile(
+    r'^(?:(?P<dotted>.*?)(?:[^\S\n]|\.)+(?P<dotted_page>\d+)[^\S\n]*'
+    r'|(?P<dashed>.+?)[^\S\n]+(?:-|—)?[^\S\n]*(?P<dashed_page>\d+)'
+    r'|(?P<bare>.*?)(?P<bare_page>\d{1,3})[^\S\n]*)$',
+    re.MULTILINE,
+)
+SAMPLE_RE = re.compile(r'\bS\s*A\s*M\s*P\s*L\s*E\b', re.IGNORECASE | re.ASCII)
+UNDERSCORES_RE = re.compile(r'[_]{2,}', re.ASCII)
+WS_RE = re.compile(r'\s{2,}', re.ASCII)
+# Whitespace in UTF-8 bytes: ASCII plus the encoded Unicode horizontal spaces
+# (no-break, ogham, en/em quad through hair space, narrow no-break, medium math, ideographic)
+BYTES_WS = rb'(?:\s|\xc2\xa0|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xaf]|\xe2\x81\x9f|\xe3\x80\x80)'
+TOC_HEADER_BYTES_RE = re.compile(
+    rb'(^|\n)' + BYTES_WS + rb'*(TABLE' + BYTES_WS + rb'+OF' + BYTES_WS + rb'*CONTENTS|TABLEOFCONTENTS|Contents|TABLE OFCONTENTS|TABLE OF CONTENTS)' + BYTES_WS + rb'*(\n|$)',
+    re.IGNORECASE,
+)
+
+# Number of lines after the TOC header that extract_toc scans
+TOC_WINDOW_LINES = 100
+# Number of consecutive lines without a page number that ends the TOC
+TOC_MAX_MISSES = 8
+
+def normalize_title(title):
+    # Underscores are replaced before collapsing whitespace so the gaps they leave are merged too
+    title = SAMPLE_RE.sub('SAMPLE', title)
+    title = UNDERSCORES_RE.sub(' ', title)
+    return WS_RE.sub(' ', title)
 
 def extract_toc(text):
     # Normalize and clean
     txt = text.replace('\r\n', '\n')
 
     # Locate start of TOC
-    toc_start_match = re.search(r'(^|\n)\s*(TABLE\s+OF\s*CONTENTS|TABLEOFCONTENTS|Contents|TABLE OFCONTENTS|TABLE OF CONTENTS)\s*(\n|$)', txt, re.IGNORECASE)
+    toc_start_match = TOC_HEADER_RE.search(txt)
     start_idx = toc_start_match.start() if toc_start_match else 0
 
     # Limit TOC to next 100 lines
-    next_100_lines = txt[start_idx:].splitlines()[:100]
-    combined_text = '\n'.join(next_100_lines)
+    next_100_lines = txt[start_idx:].splitlines()[:TOC_WINDOW_LINES]
+    # Map Unicode spaces to plain spaces within the window only
+    combined_text = '\n'.join(next_100_lines).translate(UNICODE_SPACES)
     
     # Find approximate end of TOC within these 100 lines
-    body_match = re.search(r'\n\n[A-Z][a-z].{20,}', combined_text)
+    body_match = BODY_START_RE.search(combined_text)
     end_idx = body_match.start() if body_match else len(combined_text)
     toc_region = combined_text[:end_idx]
 
     lines = [ln.strip() for ln in toc_region.splitlines() if ln.strip()]
 
     # Pre-process: Join lines that are part of the same entry
+    # If line has dots and number, it's an end of entry
+    has_end = [bool(DOTS_PAGE_RE.search(ln)) for ln in lines]
     processed_lines = []
     current_line = ""
-    
+
     for i, ln in enumerate(lines):
         # Skip TOC header
-        if re.match(r'^(TABLE\s+OF\s*CONTENTS|TABLEOFCONTENTS|Contents|TABLE OFCONTENTS|TABLE OF CONTENTS)$', ln, re.IGNORECASE):
+        if TOC_HEADER_LINE_RE.match(ln):
             continue
-            
-        # If line has dots and number, it's an end of entry
-        if re.search(r'\.{2,}\s*\d+\s*$', ln):
+
+        if has_end[i]:
             if current_line:
                 # Combine with previous line
                 processed_lines.append(f"{current_line} {ln}")
                 current_line = ""
             else:
                 processed_lines.append(ln)
+        # If next line has dots and number, this is a title line
+        elif i + 1 < len(lines) and has_end[i + 1]:
+            current_line = ln
         else:
-            # If next line has dots and number, this is a title line
-            if i + 1 < len(lines) and re.search(r'\.{2,}\s*\d+\s*$', lines[i + 1]):
-                current_line = ln
-            else:
-                processed_lines.append(ln)
+            processed_lines.append(ln)
 
+    # Classify every entry with one multiline scan over the joined lines
+    toc_text = '\n'.join(processed_lines)
     entries = []
-    for ln in processed_lines:
-        # skip TOC header line
-        if re.match(r'^(TABLE\s+OF\s*CONTENTS|TABLEOFCONTENTS|Contents|TABLE OFCONTENTS|TABLE OF CONTENTS)$', ln, re.IGNORECASE):
-            continue
+    prev_end = None
+    for m in ENTRY_RE.finditer(toc_text):
+        # A long run of lines without page numbers after an entry means the TOC has ended
+        if prev_end is not None and toc_text.count('\n', prev_end + 1, m.start()) > TOC_MAX_MISSES:
+            break
+        prev_end = m.end()
 
-        # First, try to extract simple "title ... page" pattern
-        m = re.match(r'^(.*?)[\s\.]+\d+\s*$', ln)
-        if m:
-            # Split the line by groups of dots
-            parts = re.split(r'\.{2,}', ln)
-            if parts:
-                # First part is the title
-                title = parts[0].strip()
-                # Find the page number at the end
-                page_match = re.search(r'\b(\d+)\s*$', ln)
-                if page_match:
-                    page = int(page_match.group(1))
-                    title = re.sub(r'\bS\s*A\s*M\s*P\s*L\s*E\b', 'SAMPLE', title, flags=re.IGNORECASE)
-                    title = re.sub(r'[_]{2,}', ' ', title)
-                    title = re.sub(r'\s{2,}', ' ', title)
-                    level = 2 if title.lower().startswith('part') else 1
-                    entries.append({'title': title, 'page': page, 'raw_line': ln, 'level': level})
-                    continue
-
-        # Pattern 2: Standard title ... page number
-        m = re.match(r'^(?P<title>.+?)\s*\.{2,}\s*(?P<page>\d+)$', ln)
-        if not m:
-            m = re.match(r'^(?P<title>.+?)\s+(-|\u2014)?\s*(?P<page>\d+)$', ln)
-        if not m:
-            m = re.match(r'^(?P<title>.+?)\s+(?P<page>\d{1,3})$', ln)
-
-        if m:
-            title = m.group('title').strip()
-            page = int(m.group('page'))
-            title = re.sub(r'\bS\s*A\s*M\s*P\s*L\s*E\b', 'SAMPLE', title, flags=re.IGNORECASE)
-            title = re.sub(r'[_]{2,}', ' ', title)
-            title = re.sub(r'\s{2,}', ' ', title)
-            level = 2 if title.lower().startswith('part') else 1
-            entries.append({'title': title, 'page': page, 'raw_line': ln, 'level': level})
+        ln = m.group(0)
+        if m.group('dotted_page') is not None:
+            # First part before any dot leader is the title
+            title = normalize_title(DOTS_RE.split(ln)[0].strip())
+            page = int(m.group('dotted_page'))
+        elif m.group('dashed_page') is not None:
+            title = normalize_title(m.group('dashed').strip())
+            page = int(m.group('dashed_page'))
         else:
-            m2 = re.search(r'(?P<page>\d{1,3})\s*$', ln)
-            if m2:
-                page = int(m2.group('page'))
-                title = ln[:m2.start()].strip(' .\t_')
-                entries.append({'title': title, 'page': page, 'raw_line': ln, 'level': 2 if title.lower().startswith('part') else 1})
+            title = m.group('bare').strip(' .\t_')
+            page = int(m.group('bare_page'))
+        level = 2 if title.lower().startswith('part') else 1
+        entries.append({'title': title, 'page': page, 'raw_line': ln, 'level': level})
 
     entries.sort(key=lambda x: x['page'])
     return entries
 
 
+@functools.lru_cache(maxsize=None)
+def _source_hash():
+    # Hash of this module's source, so parser edits invalidate cached entries
+    with open(__file__, "rb") as f:
+        return hashlib.blake2b(f.read())
+
+
+def cached_extract_toc(text, cache_dir=".toc_cache"):
+    # Reuse entries from a previous run when the input text is unchanged
+    h = _source_hash().copy()
+    h.update(text.encode("utf-8"))
+    h = h.hexdigest()
+    cache_path = os.path.join(cache_dir, f"{h}.json")
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        # Missing or unreadable cache entries are recomputed
+        pass
+
+    entries = extract_toc(text)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to a temp file and rename it into place, so an interrupted run never
+    # leaves a truncated cache entry behind
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return entries
+
+
+# Column layout of the per-document TOC CSVs; the combined file adds a leading doc column
+TOC_SCHEMA = pa.schema([('title', pa.string()), ('page', pa.int64()), ('raw_line', pa.string()), ('level', pa.int64())])
+ALL_TOC_SCHEMA = TOC_SCHEMA.insert(0, pa.field('doc', pa.string()))
+
+
+def write_csv(rows, outfile, schema=TOC_SCHEMA):
+    # pyarrow serializes CSV in C, avoiding a per-cell Python formatter
+    pacsv.write_csv(pa.Table.from_pylist(rows, schema=schema), outfile)
+
+
+def read_toc_text(filepath):
+    # Memory-map the file and decode only the window extract_toc looks at,
+    # instead of reading whole policy jackets into memory
+    with open(filepath, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            m = TOC_HEADER_BYTES_RE.search(mm)
+            start = m.start() if m else 0
+            end = start
+            for _ in range(TOC_WINDOW_LINES + 1):
+                end = mm.find(b"\n", end) + 1
+                if end == 0:
+                    end = len(mm)
+                    break
+            return mm[start:end].decode("utf-8")
+
+
 if __name__ == "__main__":
     # List of policy documents to process
     policy_files = [
@@ -109,27 +222,43 @@ if __name__ == "__main__":
     # Dictionary to store policy texts
     example_texts = {}
     
-    # Read all policy files
-    for i, filename in enumerate(policy_files, 1):
-        filepath = os.path.join("PolicyDocs", filename)
-        if os.path.exists(filepath):
+    # Read all policy files, overlapping the reads in a thread pool
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = {}
+        for i, filename in enumerate(policy_files, 1):
+            filepath = os.path.join("PolicyDocs", filename)
+            if os.path.exists(filepath):
+                futures[f"example{i}"] = (filename, executor.submit(read_toc_text, filepath))
+            else:
+                print(f"❌ File not found: {filepath}")
+
+        for name, (filename, future) in futures.items():
             try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    example_texts[f"example{i}"] = f.read()
+                example_texts[name] = future.result()
                 print(f"✅ Successfully loaded {filename}")
             except Exception as e:
                 print(f"❌ Error reading {filename}: {str(e)}")
-        else:
-            print(f"❌ File not found: {filepath}")
 
     # Output folder
     outdir = "extracted_toc"
     os.makedirs(outdir, exist_ok=True)
 
+    # Collect every document's entries into one combined table as well
+    doc_entries = {}
+    all_rows = []
     for name, text in example_texts.items():
-        entries = extract_toc(text)
-        df = pd.DataFrame(entries)
+        entries = cached_extract_toc(text)
+        doc_entries[name] = entries
+        all_rows.extend({'doc': name, **e} for e in entries)
+
+    outfile = os.path.join(outdir, "all_toc.csv")
+    write_csv(all_rows, outfile, ALL_TOC_SCHEMA)
+    print(f"\n✅ Saved {len(all_rows)} entries to {outfile}")
+
+    # Every loaded document gets its own file, even when no entries were found
+    for name, entries in doc_entries.items():
         outfile = os.path.join(outdir, f"{name}_toc.csv")
-        df.to_csv(outfile, index=False)
-        print(f"\n✅ Saved {len(df)} entries to {outfile}")
-        print(df.head())
+        write_csv(entries, outfile)
+        print(f"\n✅ Saved {len(entries)} entries to {outfile}")
+        for entry in entries[:5]:
+            print(entry)